@@ -4,6 +4,7 @@ import ssl
 import json
 import socket
 import os
+from collections.abc import Iterable, Iterator
 
 # Get the directory of the current script
 src_dir = os.path.dirname(os.path.abspath(__file__))
@@ -26,30 +27,35 @@ CERTFILE = os.path.join(parent_dir, config.get("certificate_file"))
 KEYFILE = os.path.join(parent_dir, config.get("key_file"))
 
 
-async def send_message(message: str) -> None:
-    """ Function to send a message to the server. """
-    try:
-        if USE_SSL:
-            context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
-            # Additional options to disable SSL verification (dev mode)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
+def create_ssl_context() -> ssl.SSLContext | None:
+    """ Function to create the SSL context for the server connection. """
+    if not USE_SSL:
+        return None
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    # Additional options to disable SSL verification (dev mode)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+
+    context.load_cert_chain(certfile=CERTFILE, keyfile=KEYFILE)
+    return context
 
-            context.load_cert_chain(certfile=CERTFILE, keyfile=KEYFILE)
-        else:
-            context = None
+
+async def send_messages(messages: Iterable[str]) -> None:
+    """ Function to send messages to the server over one connection. """
+    writer: asyncio.StreamWriter | None = None
+    try:
         reader, writer = await asyncio.open_connection(
             HOST,
             PORT,
-            ssl=context
+            ssl=create_ssl_context()
             )
         print("Connected to the server.")
-        writer.write(message.encode())
-        await writer.drain()
-        data = await reader.read(100)
-        print(f"Received: {data.decode()}")
-        writer.close()
-        await writer.wait_closed()
+        for message in messages:
+            writer.write(message.encode() + b"\n")
+            await writer.drain()
+            # Each response is a single newline-terminated line
+            data = await reader.readuntil(b"\n")
+            print(f"Received: {data.decode().rstrip()}")
     except ssl.SSLError as ssl_err:
         print(f"SSL error occurred: {ssl_err}")
     except socket.gaierror as socket_err:
@@ -58,22 +64,33 @@ async def send_message(message: str) -> None:
         print("Connection refused by the server.")
     except ConnectionResetError:
         print("Connection reset by the server.")
+    except asyncio.IncompleteReadError:
+        print("Connection closed by the server.")
     except asyncio.TimeoutError:
         print("Connection timed out.")
     finally:
-        if 'writer' in locals():
+        if writer is not None:
             writer.close()
             await writer.wait_closed()
 
 
+async def send_message(message: str) -> None:
+    """ Function to send a message to the server. """
+    await send_messages([message])
+
+
+def prompt_messages() -> Iterator[str]:
+    """ Function to prompt for search texts until an empty line. """
+    return iter(lambda: input("Please enter the search text: "), "")
+
+
 async def main() -> None:
     """ Function to start the client."""
     if config.get("prompt", False):
-        search_text = input("Please enter the search text: ")
+        # Keep the connection open for every search text entered
+        await send_messages(prompt_messages())
     else:
-        search_text = config.get("query", "hi")
-
-    await send_message(search_text)
+        await send_message(config.get("query", "hi"))
 
 # This allows the script to be run directly
 if __name__ == "__main__":
@@ -1,11 +1,33 @@
 """Module providing a function to handle asynchronous client connections."""
+import array
 import asyncio
+import bisect
+import functools
+import itertools
 import json
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import signal
+import socket
 import ssl
 import os
-from datetime import datetime
-import threading
 import time
+import types
+from collections.abc import Callable, Iterable, Mapping
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, the standard library parser is used without it
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import uvloop
+except ImportError:
+    # uvloop is optional and not available on Windows
+    uvloop = None  # type: ignore[assignment]
 
 # Get the directory of the current script
 src_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,14 +37,17 @@ parent_dir = os.path.dirname(src_dir)
 config_dir_path = os.path.join(parent_dir, 'config/config.json')
 
 
-# Load configuration function
-def load_config(config_path: str) -> dict[str, str]:
+# Load configuration function, parsed once per path
+@functools.lru_cache(maxsize=None)
+def load_config(config_path: str) -> Mapping[str, str]:
     """ Loads the configuration from a JSON file. """
     try:
         # Load configuration
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data or {}
+        with open(config_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        # Every caller shares the cached result, so hand out a read-only view
+        return types.MappingProxyType(data or {})
     except FileNotFoundError as e:
         exception = FileNotFoundError(
             f"Error: The file '{config_path}' does not exist."
@@ -50,22 +75,39 @@ config = load_config(config_dir_path)
 USE_SSL = config.get("use_ssl", False)
 CERTFILE = os.path.join(parent_dir, config.get("certificate_file", ''))
 KEYFILE = os.path.join(parent_dir, config.get("key_file", ''))
-BUFFER_SIZE = 1024
+SSL_CIPHERS = "ECDHE+AESGCM:ECDHE+CHACHA20"
+# Read up to the StreamReader limit so one read can carry many queries
+BUFFER_SIZE = 65536
+# Longest query kept while waiting for its newline
+MAX_LINE = BUFFER_SIZE
+WRITE_BUFFER_HIGH = 16384
+WRITE_BUFFER_LOW = 4096
+# Responses are sent as-is, so encode them once
+STRING_EXISTS = b"STRING EXISTS\n"
+STRING_NOT_FOUND = b"STRING NOT FOUND\n"
 HOST = config.get("server_host", "127.0.0.1")
 PORT = config.get("server_port", 8001)
+# Let every event loop bind the same port and share incoming connections
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT")
 
 linuxpath = os.path.join(parent_dir, config.get("txt_file", ''))
 REREAD_ON_QUERY = config.get("reread_on_query", False)
+LOW_MEMORY = config.get("low_memory", False)
+LOG_LEVEL = config.get("log_level", "DEBUG")
+LOG_FORMAT = "%(levelname)s: Time: %(asctime)s.%(msecs)03d, %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+logger = logging.getLogger(__name__)
 
 
-def load_txt_file(file_path: str) -> list[str]:
+def load_txt_file(file_path: str) -> list[bytes]:
     """Load the contents of the text file located at the file path."""
     try:
-        contents = []
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                contents.append(line.strip())
-        return contents
+        # Keep the lines as bytes, queries are compared without decoding
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        # Split and strip in C instead of a Python loop over the lines
+        return list(map(bytes.strip, data.splitlines()))
     except FileNotFoundError as e:
         raise FileNotFoundError(
             f"Error: The file '{file_path}' was not found."
@@ -85,53 +127,173 @@ def load_txt_file(file_path: str) -> list[str]:
     return []
 
 
-# Load the contents of the text file
-INITIAL_FILE_CONTENTS = load_txt_file(linuxpath)
+class SortedLines:
+    """ Sorted lines packed into one buffer and searched with bisect. """
+
+    def __init__(self, lines: list[bytes]) -> None:
+        # Sort the given list in place and drop adjacent repeats, building
+        # a set first would hold a hash table of every line at peak
+        lines.sort()
+        lines = [line for line, _ in itertools.groupby(lines)]
+        # One bytes object plus an offset per line instead of a set entry
+        self.blob = b"".join(lines)
+        self.offsets = array.array(
+            'Q', itertools.accumulate(map(len, lines), initial=0)
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __contains__(self, query: bytes) -> bool:
+        # Like other containers, anything that is not bytes is just absent
+        if not isinstance(query, bytes):
+            return False
+        index = bisect.bisect_left(range(len(self)), query, key=self.line)
+        return index < len(self) and self.line(index) == query
+
+    def line(self, index: int) -> bytes:
+        """ Return the line at the given sorted position. """
+        return self.blob[self.offsets[index]:self.offsets[index + 1]]
+
+    def intersection(self, queries: Iterable[bytes]) -> frozenset[bytes]:
+        """ Return the queries that are lines of the file. """
+        return frozenset(query for query in queries if query in self)
+
+
+Contents = frozenset[bytes] | SortedLines
+
+
+def build_contents(lines: list[bytes]) -> Contents:
+    """ Build the lookup structure for the lines of the text file. """
+    if LOW_MEMORY:
+        return SortedLines(lines)
+    return frozenset(lines)
 
 
-def search(contents: list[str], query: str) -> str:
+# Latest contents per file path, keyed by (st_mtime_ns, st_size)
+_contents_cache: dict[str, tuple[tuple[int, int], Contents]] = {}
+
+
+def get_contents(file_path: str) -> Contents:
+    """ Return the file contents, rereading only when the file changed. """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        # Let load_txt_file raise a descriptive error
+        return build_contents(load_txt_file(file_path))
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _contents_cache.get(file_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    # Replace the previous version so only one copy is kept in memory
+    contents = build_contents(load_txt_file(file_path))
+    _contents_cache[file_path] = (key, contents)
+    return contents
+
+
+# Load the contents of the text file once for fast lookups
+INITIAL_FILE_CONTENTS = get_contents(linuxpath)
+
+
+def search(contents: Contents, query: bytes) -> bytes:
     """ Search for the specified query in the given text contents """
     if query in contents:
-        return 'STRING EXISTS'
-    return 'STRING NOT FOUND'
+        return STRING_EXISTS
+    return STRING_NOT_FOUND
+
+
+def search_many(contents: Contents, queries: list[bytes]) -> list[bytes]:
+    """ Search for several queries at once in the given text contents """
+    # Intersect once so each query is checked against the (small) hit set
+    found = contents.intersection(queries)
+    return [
+        STRING_EXISTS if query in found else STRING_NOT_FOUND
+        for query in queries
+    ]
+
+
+def tune_connection(writer: asyncio.StreamWriter) -> None:
+    """ Disable Nagle's algorithm and shrink the write buffer limits. """
+    sock = writer.get_extra_info('socket')
+    if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if hasattr(socket, "TCP_QUICKACK"):
+            # Linux only: acknowledge queries without the delayed-ACK wait
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+    writer.transport.set_write_buffer_limits(
+        high=WRITE_BUFFER_HIGH,
+        low=WRITE_BUFFER_LOW
+    )
 
 
 async def handle_client(
                         reader: asyncio.StreamReader,
-                        writer: asyncio.StreamWriter) -> None:
+                        writer: asyncio.StreamWriter,
+                        *,
+                        clock: Callable[[], int] = time.perf_counter_ns
+                        ) -> None:
     """ Handle an asynchronous client connection. """
-    start_time = time.time()
     client_ip = writer.get_extra_info('peername')[0]
+    # Bytes of a query whose terminating newline has not arrived yet
+    pending = b""
     try:
+        tune_connection(writer)
         while True:
             # Read the message from the client
             data = await reader.read(BUFFER_SIZE)
-            if not data:
+            if data:
+                # Split only the new bytes, the carried tail is at most
+                # MAX_LINE long and only joined to the first line
+                lines = data.split(b"\n")
+                lines[0] = pending + lines[0]
+                pending = lines.pop()
+                if len(pending) > MAX_LINE:
+                    logger.warning(
+                        "IP: %s, Query longer than %d bytes, closing",
+                        client_ip, MAX_LINE
+                    )
+                    break
+                if not lines:
+                    continue
+            elif pending.strip():
+                # The client sent a last query without a newline
+                lines, pending = [pending], b""
+            else:
                 break
-            message = data.decode('utf-8').strip()
-            contents = []
+            # Only time the batch when the result is going to be logged,
+            # `clock` returns nanoseconds and can be replaced in tests
+            log_query = logger.isEnabledFor(logging.DEBUG)
+            if log_query:
+                start_time = clock()
+            queries = [line.strip() for line in lines]
 
             # Check if the contents should be reloaded
             if REREAD_ON_QUERY:
-                contents = load_txt_file(linuxpath)
+                contents = get_contents(linuxpath)
             else:
                 contents = INITIAL_FILE_CONTENTS
 
-            search_results = search(contents, message)
+            search_results = search_many(contents, queries)
 
-            # Send a response back to the client
-            response = f"{search_results}" + "\n"
-            writer.write(response.encode())
-            await writer.drain()
+            # Send all responses back to the client in a single call
+            writer.writelines(search_results)
+            # drain() yields to the loop even with an empty send buffer,
+            # so only wait once the transport is past its high-water mark
+            if writer.transport.get_write_buffer_size() > WRITE_BUFFER_HIGH:
+                await writer.drain()
 
-            # Log the details of the query
-            execution_time = (time.time() - start_time) * 1000
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            log_message = (
-                f"DEBUG: Time: {timestamp}, IP: {client_ip}, "
-                f"Query: {message}, Execution Time: {execution_time:.2f} ms"
-            )
-            print(log_message)
+            # Log the details of the query, formatted only when enabled
+            if log_query:
+                execution_time = (clock() - start_time) / 1e6
+                logger.debug(
+                    "IP: %s, Query: %s, Execution Time: %.2f ms",
+                    client_ip, b", ".join(queries).decode('utf-8', 'replace'),
+                    execution_time
+                )
+
+            # The client has finished sending
+            if not data:
+                break
     except asyncio.IncompleteReadError as e:
         raise asyncio.IncompleteReadError(e.partial, e.expected) from e
     except ConnectionResetError as e:
@@ -139,65 +301,129 @@ async def handle_client(
             f"Error: Connection reset by the server: {e}"
         ) from e
     finally:
-        print("Closing connection")
+        logger.debug("Closing connection")
         writer.close()
         await writer.wait_closed()
 
 
 def create_ssl_context() -> ssl.SSLContext:
     """ Create and return an SSL context for secure client connections. """
-    cert_missing = not os.path.exists(CERTFILE) or not CERTFILE
-    key_missing = not os.path.exists(KEYFILE) or not KEYFILE
-    if cert_missing or key_missing:
-        raise FileNotFoundError("SSL certificate or key file not found")
+    # An unset path joins to the project directory, which is not a file
+    missing = [
+        path for path in (CERTFILE, KEYFILE) if not os.path.isfile(path)
+    ]
+    if missing:
+        raise FileNotFoundError(
+            "SSL certificate or key file not found: " + ", ".join(missing)
+        )
     context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
     context.load_cert_chain(certfile=CERTFILE, keyfile=KEYFILE)
+    # Forward-secret AEAD suites only for TLS 1.2, and no record compression
+    context.set_ciphers(SSL_CIPHERS)
+    context.options |= ssl.OP_NO_COMPRESSION
     return context
 
 
-async def main() -> None:
+async def main(ssl_context: ssl.SSLContext | None = None) -> None:
     """ Start the server and serve client connections. """
     server = await asyncio.start_server(
         handle_client,
         HOST,
         PORT,
-        ssl=create_ssl_context() if USE_SSL else None
+        reuse_port=REUSE_PORT,
+        ssl=ssl_context
     )
 
     address = server.sockets[0].getsockname()
-    print(f'Serving on {address}')
+    logger.info("Serving on %s", address)
     await server.serve_forever()
 
 
-if __name__ == "__main__":
-    # Function to start the server
-    # Run multiple threads in production
+def start_log_listener() -> logging.handlers.QueueListener:
+    """ Write the log records of this process from a background thread. """
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    root = logging.getLogger()
+    # The configured handlers now run in the listener thread
+    listener = logging.handlers.QueueListener(
+        log_queue, *root.handlers, respect_handler_level=True
+    )
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
+def run(ssl_context: ssl.SSLContext | None = None) -> None:
+    """ Run the server on uvloop when it is installed. """
+    # Keep the blocking log handler writes (stderr) off the event loop
+    listener = start_log_listener()
     try:
-        # Run two threads per CPU core
-        cpu_count = os.cpu_count()
-        if cpu_count is None:
-            # Fallback in case os.cpu_count() returns None
-            MAX_WORKERS = 8
+        if uvloop is not None:
+            uvloop.run(main(ssl_context))
         else:
-            MAX_WORKERS = cpu_count * 2
+            asyncio.run(main(ssl_context))
+    except KeyboardInterrupt:
+        # The parent process reports the shutdown
+        pass
+    finally:
+        listener.stop()
+
 
-        threads = []
+def start_workers(
+        ssl_context: ssl.SSLContext | None = None
+        ) -> list[multiprocessing.process.BaseProcess]:
+    """ Start one server process per CPU core sharing the port. """
+    if not REUSE_PORT:
+        # Without SO_REUSEPORT only one process can bind the port
+        max_workers = 1
+    else:
+        # Fallback in case os.cpu_count() returns None
+        max_workers = os.cpu_count() or 1
 
-        print(f"Number of CPU cores / threads: {MAX_WORKERS}")
+    # Forked workers inherit the parsed config, loaded file contents and
+    # SSL context instead of importing this module again
+    mp_context: (
+        multiprocessing.context.ForkContext
+        | multiprocessing.context.DefaultContext
+    )
+    if "fork" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("fork")
+    else:
+        mp_context = multiprocessing.get_context()
 
-        # Create and start threads
-        for _ in range(MAX_WORKERS):
-            thread = threading.Thread(target=asyncio.run(main()))
-            threads.append(thread)
-            thread.start()
+    logger.info("Number of worker processes: %s", max_workers)
 
-        # Join threads
-        for thread in threads:
-            thread.join()
+    processes: list[multiprocessing.process.BaseProcess] = []
+    for _ in range(max_workers):
+        process = mp_context.Process(
+            target=run, args=(ssl_context,), daemon=True
+        )
+        processes.append(process)
+        process.start()
+    return processes
 
-        while True:
-            time.sleep(1)
+
+def stop_on_sigterm(signum: int, frame: object) -> None:
+    """ Exit on SIGTERM so the daemon workers are stopped as well. """
+    raise SystemExit(128 + signum)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format=LOG_FORMAT,
+        datefmt=LOG_DATE_FORMAT
+    )
+    # The default SIGTERM action skips the exit handlers that stop workers
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
+    # Load the certificates once, before the workers are forked
+    ssl_context = create_ssl_context() if USE_SSL else None
+    # Function to start the server
+    # Run one worker process per CPU core in production
+    try:
+        # Wait for the worker processes to exit
+        for worker in start_workers(ssl_context):
+            worker.join()
     except KeyboardInterrupt:
-        print("Server stopped manually.")
+        logger.info("Server stopped manually.")
     finally:
-        print("Server stopped.")
+        logger.info("Server stopped.")
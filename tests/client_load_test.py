@@ -1,78 +1,44 @@
-""" Cloned client module for load testing. """
-import asyncio
-import ssl
-import json
+""" Client helpers for load testing, built on the client module. """
 import socket
 import os
+import sys
 
 # Get the directory of the current script
-src_dir = os.path.dirname(os.path.abspath(__file__))
+tests_dir = os.path.dirname(os.path.abspath(__file__))
 # Go one level above
-parent_dir = os.path.dirname(src_dir)
-# Construct the full path to the config file
-config_path = os.path.join(parent_dir, 'config/config.json')
-
-# Load configuration
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-# Define variables
-HOST = config.get("client_host", "localhost")
-PORT = config.get("client_port", 8001)
-PROMPT = config.get("prompt", False)
-QUERY = config.get("query", "hi")
-USE_SSL = config.get("use_ssl", False)
-CERTFILE = os.path.join(parent_dir, config.get("certificate_file"))
-KEYFILE = os.path.join(parent_dir, config.get("key_file"))
-
-
-async def send_message(message: str) -> None:
-    """ Function to send a message to the server. """
-    try:
-        if USE_SSL:
-            context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
-            # Additional options to disable SSL verification (dev mode)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-
-            context.load_cert_chain(certfile=CERTFILE, keyfile=KEYFILE)
-        else:
-            context = None
-        reader, writer = await asyncio.open_connection(
-            HOST,
-            PORT,
-            ssl=context
-            )
-        print("Connected to the server.")
-        writer.write(message.encode())
-        await writer.drain()
-        data = await reader.read(100)
-        print(f"Received: {data.decode()}")
-        writer.close()
-        await writer.wait_closed()
-    except ssl.SSLError as ssl_err:
-        print(f"SSL error occurred: {ssl_err}")
-    except socket.gaierror as socket_err:
-        print(f"Socket error occurred: {socket_err}")
-    except ConnectionRefusedError:
-        print("Connection refused by the server.")
-    except ConnectionResetError:
-        print("Connection reset by the server.")
-    except asyncio.TimeoutError:
-        print("Connection timed out.")
-    finally:
-        if 'writer' in locals():
-            writer.close()
-            await writer.wait_closed()
-
-
-async def main() -> None:
-    """ Function to start the client. """
-    # Check if the prompt flag is set
-    if config.get("prompt", False):
-        search_text = input("Please enter the search text: ")
-    else:
-        # Get the query from the config file
-        search_text = config.get("query", "hi")
-
-    await send_message(search_text)
+parent_dir = os.path.dirname(tests_dir)
+# Locust only puts the tests directory on the path
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+# Reuse the client configuration, SSL context and async sender
+from src.client import (  # noqa: E402  pylint: disable=wrong-import-position
+    HOST,
+    PORT,
+    create_ssl_context,
+    send_message,
+)
+
+__all__ = ["open_connection", "query", "send_message"]
+
+
+def open_connection() -> socket.socket:
+    """ Function to open a blocking connection reused for queries. """
+    sock = socket.create_connection((HOST, PORT))
+    context = create_ssl_context()
+    if context is not None:
+        return context.wrap_socket(sock)
+    return sock
+
+
+def query(sock: socket.socket, message: str) -> str:
+    """ Function to send a query over an open connection. """
+    sock.sendall(message.encode() + b"\n")
+    # Each response is a single newline-terminated line
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(100)
+        if not chunk:
+            raise ConnectionResetError("Connection closed by the server.")
+        data += chunk
+    return data.decode()
@@ -1,33 +1,39 @@
 """ Module providing a Locust load test. """
-import asyncio
 import time
 from locust import User, task, between, events
-from main_load_test import main
+from client_load_test import open_connection
+from main_load_test import run_query
 
 
 class LoadTestUser(User):
     """ Locust user class. """
     wait_time = between(1, 5)
 
+    def on_start(self) -> None:
+        """ Function to open the connection reused by every task. """
+        self.sock = open_connection()
+
+    def on_stop(self) -> None:
+        """ Function to close the connection. """
+        self.sock.close()
+
     @task
     def run_client(self) -> None:
         """ Function to send a message to the server. """
         start_time = time.time()
         try:
-
-            asyncio.run(main())
+            response = run_query(self.sock)
 
             # Report success
             total_time = int((time.time() - start_time) * 1000)
-            response_length = 0  # Adjust based on your actual response length
             events.request.fire(
                 request_type="grpc", name="run_client",
-                response_time=total_time, response_length=response_length,
-                response=None, context=None, exception=None,
+                response_time=total_time, response_length=len(response),
+                response=response, context=None, exception=None,
                 start_time=start_time, url=None
             )
         except Exception as e:
-            # Report failure
+            # Report failure and reconnect for the next task
             total_time = int((time.time() - start_time) * 1000)
             events.request.fire(
                 request_type="grpc", name="run_client",
@@ -35,6 +41,8 @@ class LoadTestUser(User):
                 response=None, context=None, exception=e,
                 start_time=start_time, url=None
             )
+            self.sock.close()
+            self.sock = open_connection()
 
 
 # Setup and teardown events
@@ -1,10 +1,18 @@
 """ Cloned main module for load testing. """
-from client_load_test import send_message
+import socket
+from client_load_test import send_message, query
+
+QUERY = "16;0;21;11;0;19;4;0;"
 
 
 async def run_client() -> None:
     """ Asynchronously sends a message to the server. """
-    await send_message("16;0;21;11;0;19;4;0;")
+    await send_message(QUERY)
+
+
+def run_query(sock: socket.socket) -> str:
+    """ Sends a query over an open connection. """
+    return query(sock, QUERY)
 
 
 async def main() -> None:
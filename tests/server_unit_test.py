@@ -1,179 +1,524 @@
 """ Test for the `server` module. """
-from unittest.mock import patch, AsyncMock, MagicMock
+from collections import deque
+from collections.abc import Iterator
+from typing import cast
+from unittest.mock import call, patch, AsyncMock, MagicMock
 from pathlib import Path
 import json
+import logging
+import logging.handlers
+import re
+import signal
+import socket
 import ssl
 import asyncio
+import itertools
 import pytest
-from freezegun import freeze_time
 from src import server
 
+PEER_INFO = {'peername': ('127.0.0.1', 54321)}
+FRUITS = frozenset([b"apple", b"banana", b"cherry"])
+LARGE_CONTENTS = frozenset(b"%d" % i for i in range(10_000))
+# Expected replies, spelled out rather than taken from the server module
+EXISTS = b"STRING EXISTS\n"
+NOT_FOUND = b"STRING NOT FOUND\n"
+# Module-level settings of the server that tests may replace
+SERVER_STATE = (
+    "REREAD_ON_QUERY",
+    "LOW_MEMORY",
+    "USE_SSL",
+    "INITIAL_FILE_CONTENTS",
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_server_state() -> Iterator[None]:
+    """ Restore the server settings and contents cache after each test. """
+    saved = {name: getattr(server, name) for name in SERVER_STATE}
+    contents_cache = dict(server._contents_cache)
+    yield
+    for name, value in saved.items():
+        setattr(server, name, value)
+    server._contents_cache.clear()
+    server._contents_cache.update(contents_cache)
+
+
+def connection_calls(*batches: list[bytes]) -> list:
+    """ Writer calls expected from a connection answering the batches. """
+    calls = [
+        call.get_extra_info('peername'),
+        call.get_extra_info('socket'),
+        call.transport.set_write_buffer_limits(
+            high=server.WRITE_BUFFER_HIGH, low=server.WRITE_BUFFER_LOW
+        ),
+    ]
+    for batch in batches:
+        calls += [
+            call.writelines(batch),
+            call.transport.get_write_buffer_size(),
+        ]
+    return calls + [call.close(), call.wait_closed()]
+
+
+class FakeReader:
+    """ `StreamReader` stand-in returning the given chunks, then EOF. """
+
+    def __init__(self, *chunks: bytes | Exception) -> None:
+        self.chunks = deque(chunks)
+        self.sizes: list[int] = []
+
+    async def read(self, n: int = -1) -> bytes:
+        """ Return the next chunk, or raise it if it is an exception. """
+        self.sizes.append(n)
+        if not self.chunks:
+            return b""
+        chunk = self.chunks.popleft()
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
+
+
+@pytest.fixture
+def writer() -> MagicMock:
+    """ Mock `StreamWriter` for a client connected from `PEER_INFO`. """
+    writer = MagicMock()
+    writer.get_extra_info = MagicMock(side_effect=PEER_INFO.get)
+    writer.drain = AsyncMock()
+    writer.transport.get_write_buffer_size.return_value = 0
+    writer.wait_closed = AsyncMock()
+    return writer
+
+
+@pytest.fixture
+def fruits(monkeypatch: pytest.MonkeyPatch) -> frozenset[bytes]:
+    """ Serve `FRUITS` from memory instead of rereading the text file. """
+    monkeypatch.setattr(server, "REREAD_ON_QUERY", False)
+    monkeypatch.setattr(server, "INITIAL_FILE_CONTENTS", FRUITS)
+    return FRUITS
+
+
+@pytest.fixture
+def start_server_mock(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """ Replace `asyncio.start_server` with a mock listening server. """
+    server_mock = AsyncMock()
+    server_mock.sockets = [MagicMock()]
+    server_mock.sockets[0].getsockname.return_value = ('127.0.0.1', 8001)
+    start_server = AsyncMock(return_value=server_mock)
+    monkeypatch.setattr(server.asyncio, "start_server", start_server)
+    return start_server
+
 
 # Test for the `search` function
 @pytest.mark.parametrize("contents, query, expected", [
-    (["apple", "banana", "cherry"], "banana", "STRING EXISTS"),
-    (["apple", "banana", "cherry"], "grape", "STRING NOT FOUND"),
-    ([], "apple", "STRING NOT FOUND"),
-    (["apple", "banana", "cherry"], "", "STRING NOT FOUND"),
-    (["apple", "apple", "apple"], "apple", "STRING EXISTS"),
+    (FRUITS, b"banana", b"STRING EXISTS\n"),
+    (FRUITS, b"grape", b"STRING NOT FOUND\n"),
+    (frozenset(), b"apple", b"STRING NOT FOUND\n"),
+    (FRUITS, b"", b"STRING NOT FOUND\n"),
+    (frozenset([b"apple", b"apple", b"apple"]), b"apple",
+     b"STRING EXISTS\n"),
+    (LARGE_CONTENTS, b"9999", b"STRING EXISTS\n"),
+    (LARGE_CONTENTS, b"10000", b"STRING NOT FOUND\n"),
+    (LARGE_CONTENTS, b"", b"STRING NOT FOUND\n"),
 ])
-def test_search(contents: list[str], query: str, expected: str) -> None:
+def test_search(contents: frozenset[bytes], query: bytes,
+                expected: bytes) -> None:
     """ Test the `search` function. """
     assert server.search(contents, query) == expected
 
 
-# Test for the `handle_client` function
-@pytest.mark.asyncio
-async def test_handle_client() -> None:
-    """ Test the `handle_client` function. """
-    reader = AsyncMock()
-    writer = MagicMock()
-    reader.read = AsyncMock(side_effect=[b"apple\n", b""])
-    writer.get_extra_info = MagicMock(return_value=('127.0.0.1',))
-    writer.drain = AsyncMock()
-    writer.wait_closed = AsyncMock()
+@pytest.mark.parametrize("query, expected", [
+    (b"apple", True),
+    (b"banana", True),
+    (b"cherry", True),
+    (b"grape", False),
+    (b"appl", False),
+    (b"cherryx", False),
+    (b"", False),
+])
+def test_sorted_lines_contains(query: bytes, expected: bool) -> None:
+    """ Test looking up lines in `SortedLines`. """
+    contents = server.SortedLines([b"cherry", b"apple", b"banana", b"apple"])
+    assert (query in contents) is expected
 
-    with freeze_time("2023-01-01 12:00:00"):
-        with patch('src.server.time.time', side_effect=[1000.0, 1000.1]):
-            with patch('src.server.load_txt_file',
-                       return_value=["te", "st", "op"]):
-                server.REREAD_ON_QUERY = True
-                await server.handle_client(reader, writer)
 
-                writer.write.assert_called_with(b'STRING NOT FOUND\n')
-                assert writer.write.call_count == 1
+def test_sorted_lines_other_types() -> None:
+    """ Test `SortedLines` reports values that are not bytes as absent. """
+    contents = server.SortedLines([b"apple", b"banana"])
+    assert "apple" not in contents  # type: ignore[operator]
+    assert None not in contents  # type: ignore[operator]
+    assert len(contents) == 2
 
-                writer.drain.assert_called()
-                assert writer.drain.call_count == 1
 
-                writer.close.assert_called()
-                writer.wait_closed.assert_called()
+def test_sorted_lines_empty() -> None:
+    """ Test looking up a line in an empty `SortedLines`. """
+    assert b"apple" not in server.SortedLines([])
 
 
-@pytest.mark.asyncio
-async def test_handle_client_no_reread() -> None:
-    """ Test the `handle_client` function with `REREAD_ON_QUERY` = `False`. """
-    reader = AsyncMock()
-    writer = MagicMock()
-    reader.read = AsyncMock(side_effect=[b"grape\n", b""])
-    writer.get_extra_info = MagicMock(return_value=('127.0.0.1',))
-    writer.drain = AsyncMock()
-    writer.wait_closed = AsyncMock()
+def test_search_sorted_lines() -> None:
+    """ Test the search functions with `SortedLines` contents. """
+    contents = server.SortedLines([b"apple", b"banana", b"cherry"])
+    assert server.search(contents, b"banana") == b"STRING EXISTS\n"
+    assert server.search_many(contents, [b"grape", b"apple"]) == [
+        b"STRING NOT FOUND\n",
+        b"STRING EXISTS\n",
+    ]
 
-    with freeze_time("2023-01-01 12:00:00"):
-        with patch('src.server.time.time', side_effect=[1000.0, 1000.2]):
-            with patch('src.server.INITIAL_FILE_CONTENTS',
-                       ["apple", "banana", "cherry"]):
-                # global REREAD_ON_QUERY
-                server.REREAD_ON_QUERY = False
-                await server.handle_client(reader, writer)
 
-                writer.write.assert_called_with(b'STRING NOT FOUND\n')
-                assert writer.write.call_count == 1
+@pytest.mark.parametrize("low_memory, expected_type", [
+    (False, frozenset),
+    (True, server.SortedLines),
+])
+def test_build_contents(low_memory: bool, expected_type: type) -> None:
+    """ Test the `build_contents` function. """
+    with patch('src.server.LOW_MEMORY', low_memory):
+        contents = server.build_contents([b"apple", b"banana"])
+    assert isinstance(contents, expected_type)
+    assert b"apple" in contents
+
+
+def test_search_many() -> None:
+    """ Test the `search_many` function. """
+    queries = [b"banana", b"grape", b"", b"apple", b"banana"]
+    assert server.search_many(FRUITS, queries) == [
+        b"STRING EXISTS\n",
+        b"STRING NOT FOUND\n",
+        b"STRING NOT FOUND\n",
+        b"STRING EXISTS\n",
+        b"STRING EXISTS\n",
+    ]
 
-                writer.drain.assert_called()
-                assert writer.drain.call_count == 1
 
-                writer.close.assert_called()
-                writer.wait_closed.assert_called()
+# Test for the `handle_client` function
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client(writer: MagicMock,
+                             monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Test the `handle_client` function. """
+    reader = FakeReader(b"apple\n")
+    get_contents = MagicMock(return_value=frozenset([b"te", b"st", b"op"]))
+    monkeypatch.setattr(server, "REREAD_ON_QUERY", True)
+    monkeypatch.setattr(server, "get_contents", get_contents)
+    await server.handle_client(cast(asyncio.StreamReader, reader), writer)
+
+    get_contents.assert_called_once_with(server.linuxpath)
+    # One reply, no drain below the high-water mark, then the close
+    assert writer.method_calls == connection_calls([b'STRING NOT FOUND\n'])
+
+
+@pytest.mark.parametrize("chunks, batches", [
+    # One query without rereading the file
+    ([b"grape\n"], [[NOT_FOUND]]),
+    # Several queries in one read are answered together
+    ([b"apple\ngrape\ncherry\n"], [[EXISTS, NOT_FOUND, EXISTS]]),
+    # Queries split across reads, the last one without a newline is
+    # answered at EOF
+    ([b"app", b"le\ngra", b"pe\nban", b"ana"],
+     [[EXISTS], [NOT_FOUND], [EXISTS]]),
+])
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_replies(
+        writer: MagicMock, fruits: frozenset[bytes],
+        chunks: list[bytes], batches: list[list[bytes]]) -> None:
+    """ Test the replies `handle_client` sends for the chunks it reads. """
+    reader = FakeReader(*chunks)
+
+    await server.handle_client(cast(asyncio.StreamReader, reader), writer)
+
+    assert set(reader.sizes) == {server.BUFFER_SIZE}
+    # The peer address is looked up once per connection, not per query
+    assert writer.method_calls == connection_calls(*batches)
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_line_too_long(
+        writer: MagicMock, fruits: frozenset[bytes],
+        caplog: pytest.LogCaptureFixture) -> None:
+    """ Test the `handle_client` function drops a client over `MAX_LINE`. """
+    chunk = b"x" * server.BUFFER_SIZE
+    reader = FakeReader(*[chunk] * 16)
+
+    await server.handle_client(cast(asyncio.StreamReader, reader), writer)
+
+    # The connection closes once the line passes the limit, so the rest
+    # of the data is never read or kept
+    assert len(reader.sizes) == server.MAX_LINE // len(chunk) + 1
+    assert len(reader.chunks) == 16 - len(reader.sizes)
+    writer.writelines.assert_not_called()
+    writer.close.assert_called_once()
+    writer.wait_closed.assert_awaited_once()
+    assert caplog.messages[0] == (
+        f"IP: 127.0.0.1, Query longer than {server.MAX_LINE} bytes, closing"
+    )
 
 
-@pytest.mark.asyncio
-async def test_handle_client_incomplete_read_error() -> None:
-    """ Test the `handle_client` for handling `IncompleteReadError`. """
-    reader = AsyncMock()
-    writer = MagicMock()
-    reader.read = AsyncMock(
-        side_effect=asyncio.IncompleteReadError(partial=b'data', expected=10)
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_drains_full_buffer(
+        writer: MagicMock, fruits: frozenset[bytes]) -> None:
+    """ Test the `handle_client` function waits for a full send buffer. """
+    reader = FakeReader(b"apple\n")
+    writer.transport.get_write_buffer_size.return_value = (
+        server.WRITE_BUFFER_HIGH + 1
     )
-    writer.get_extra_info = MagicMock(return_value=('127.0.0.1',))
-    writer.drain = AsyncMock()
-    writer.wait_closed = AsyncMock()
 
-    incomplete_read_error_raised = False
+    await server.handle_client(cast(asyncio.StreamReader, reader), writer)
 
-    try:
-        await server.handle_client(reader, writer)
-    except asyncio.IncompleteReadError:
-        incomplete_read_error_raised = True
+    writer.drain.assert_awaited_once()
 
-    assert incomplete_read_error_raised, "IncompleteReadError was not raised"
 
-    writer.close.assert_called()
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_logs_query(
+        writer: MagicMock,
+        caplog: pytest.LogCaptureFixture, fruits: frozenset[bytes]) -> None:
+    """ Test the `handle_client` function logs each query at DEBUG. """
+    reader = FakeReader(b"apple\n", b"grape\n")
+    # Every clock reading is 50 ms after the previous one
+    clock = itertools.count(1_000_000, 50_000_000).__next__
+
+    caplog.set_level(logging.DEBUG, logger=server.logger.name)
+    await server.handle_client(
+        cast(asyncio.StreamReader, reader), writer, clock=clock
+    )
+
+    # Each query is timed on its own, not from the start of the connection
+    assert caplog.messages[:2] == [
+        "IP: 127.0.0.1, Query: apple, Execution Time: 50.00 ms",
+        "IP: 127.0.0.1, Query: grape, Execution Time: 50.00 ms",
+    ]
+
 
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_skips_timing_above_debug(
+        writer: MagicMock,
+        caplog: pytest.LogCaptureFixture, fruits: frozenset[bytes]) -> None:
+    """ Test the `handle_client` function only times logged queries. """
+    reader = FakeReader(b"apple\n")
 
-@pytest.mark.asyncio
-async def test_handle_client_connection_reset_error() -> None:
-    """ Test the `handle_client` for handling `ConnectionResetError`. """
-    reader = AsyncMock()
+    caplog.set_level(logging.INFO, logger=server.logger.name)
+    clock_mock = MagicMock()
+    await server.handle_client(
+        cast(asyncio.StreamReader, reader), writer, clock=clock_mock
+    )
+
+    clock_mock.assert_not_called()
+    writer.writelines.assert_called_once_with([b"STRING EXISTS\n"])
+    assert not caplog.messages
+
+
+def test_tune_connection() -> None:
+    """ Test the `tune_connection` function. """
+    sock = MagicMock()
+    sock.family = socket.AF_INET
     writer = MagicMock()
-    reader.read = AsyncMock(
-        side_effect=ConnectionResetError("Connection reset")
+    writer.get_extra_info = MagicMock(return_value=sock)
+
+    server.tune_connection(writer)
+
+    sock.setsockopt.assert_any_call(
+        socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+    )
+    if hasattr(socket, "TCP_QUICKACK"):
+        sock.setsockopt.assert_any_call(
+            socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1
+        )
+    writer.transport.set_write_buffer_limits.assert_called_once_with(
+        high=server.WRITE_BUFFER_HIGH,
+        low=server.WRITE_BUFFER_LOW
     )
-    writer.get_extra_info = MagicMock(return_value=('127.0.0.1',))
-    writer.drain = AsyncMock()
-    writer.wait_closed = AsyncMock()
 
-    connection_reset_error_raised = False
 
-    try:
-        await server.handle_client(reader, writer)
-    except ConnectionResetError:
-        connection_reset_error_raised = True
+def test_tune_connection_without_socket() -> None:
+    """ Test the `tune_connection` function without a TCP socket. """
+    writer = MagicMock()
+    writer.get_extra_info = MagicMock(return_value=None)
+
+    server.tune_connection(writer)
 
-    assert connection_reset_error_raised, "ConnectionResetError was not raised"
+    writer.transport.set_write_buffer_limits.assert_called_once()
+
+
+@pytest.mark.parametrize("error", [
+    asyncio.IncompleteReadError(partial=b'data', expected=10),
+    ConnectionResetError("Connection reset"),
+])
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_read_errors(
+        writer: MagicMock, error: Exception) -> None:
+    """ Test the `handle_client` function closes the writer on errors. """
+    reader = FakeReader(error)
+
+    with pytest.raises(type(error)):
+        await server.handle_client(cast(asyncio.StreamReader, reader), writer)
 
     writer.close.assert_called()
+    writer.wait_closed.assert_called()
 
 
-@pytest.mark.asyncio
-async def test_main() -> None:
+@pytest.mark.asyncio(scope="module")
+async def test_handle_client_loopback(fruits: frozenset[bytes]) -> None:
+    """ Test the `handle_client` function over a real TCP connection. """
+    tcp_server = await asyncio.start_server(
+        server.handle_client, '127.0.0.1', 0
+    )
+    port = tcp_server.sockets[0].getsockname()[1]
+    async with tcp_server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b"apple\ngrape\nban")
+        await writer.drain()
+        writer.write(b"ana\n")
+        writer.write_eof()
+        # Fail instead of hanging the run if a reply never arrives
+        responses = [
+            await asyncio.wait_for(reader.readuntil(b"\n"), timeout=5)
+            for _ in range(3)
+        ]
+        # The server closes the connection once the client is done
+        assert await asyncio.wait_for(reader.read(), timeout=5) == b""
+        writer.close()
+        await writer.wait_closed()
+
+    assert responses == [
+        b"STRING EXISTS\n",
+        b"STRING NOT FOUND\n",
+        b"STRING EXISTS\n",
+    ]
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_main(monkeypatch: pytest.MonkeyPatch,
+                    start_server_mock: AsyncMock) -> None:
     """ Test the main function of the server module. """
-    server_mock = AsyncMock()
-    server_mock.sockets = [MagicMock()]
-    server_mock.sockets[0].getsockname.return_value = ('127.0.0.1', 8001)
+    create_mock = MagicMock()
+    monkeypatch.setattr(server, "create_ssl_context", create_mock)
 
-    with patch('src.server.asyncio.start_server',
-               return_value=server_mock) as start_server_mock:
-        with patch('src.server.create_ssl_context',
-                   return_value=MagicMock()):
-            with patch('src.server.USE_SSL', False):
-                await server.main()
-                start_server_mock.assert_called_once_with(
-                    server.handle_client,
-                    '127.0.0.1',
-                    8001,
-                    ssl=None
-                )
-                server_mock.serve_forever.assert_called_once()
+    await server.main()
+
+    start_server_mock.assert_called_once_with(
+        server.handle_client,
+        '127.0.0.1',
+        8001,
+        reuse_port=server.REUSE_PORT,
+        ssl=None
+    )
+    start_server_mock.return_value.serve_forever.assert_called_once()
+    create_mock.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_main_with_ssl() -> None:
+@pytest.mark.asyncio(scope="module")
+async def test_main_with_ssl(monkeypatch: pytest.MonkeyPatch,
+                             start_server_mock: AsyncMock) -> None:
     """ Test the main function of the server module with SSL. """
-    server_mock = AsyncMock()
-    server_mock.sockets = [MagicMock()]
-    server_mock.sockets[0].getsockname.return_value = ('127.0.0.1', 8001)
     ssl_context_mock = MagicMock()
+    create_mock = MagicMock()
+    monkeypatch.setattr(server, "create_ssl_context", create_mock)
 
-    with patch('src.server.asyncio.start_server',
-               return_value=server_mock) as start_server_mock:
-        with patch('src.server.create_ssl_context',
-                   return_value=ssl_context_mock):
-            with patch('src.server.USE_SSL', True):
-                await server.main()
-                start_server_mock.assert_called_once_with(
-                    server.handle_client,
-                    '127.0.0.1',
-                    8001,
-                    ssl=ssl_context_mock
-                )
-                server_mock.serve_forever.assert_called_once()
+    await server.main(ssl_context_mock)
+
+    start_server_mock.assert_called_once_with(
+        server.handle_client,
+        '127.0.0.1',
+        8001,
+        reuse_port=server.REUSE_PORT,
+        ssl=ssl_context_mock
+    )
+    start_server_mock.return_value.serve_forever.assert_called_once()
+    # The context passed in is used instead of loading the certs
+    create_mock.assert_not_called()
+
+
+@pytest.mark.skipif(not server.REUSE_PORT, reason="needs SO_REUSEPORT")
+@pytest.mark.asyncio(scope="module")
+async def test_workers_share_port() -> None:
+    """ Test two listeners can bind the same port like the workers do. """
+    first = await asyncio.start_server(
+        server.handle_client, '127.0.0.1', 0, reuse_port=server.REUSE_PORT
+    )
+    port = first.sockets[0].getsockname()[1]
+    second = await asyncio.start_server(
+        server.handle_client, '127.0.0.1', port, reuse_port=server.REUSE_PORT
+    )
+    async with first, second:
+        for listener in (first, second):
+            sock = listener.sockets[0]
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)
+            assert sock.getsockname()[1] == port
+
+
+def test_run_with_uvloop() -> None:
+    """ Test the `run` function uses uvloop when it is installed. """
+    uvloop_mock = MagicMock()
+    with patch('src.server.uvloop', uvloop_mock), \
+            patch('src.server.start_log_listener'):
+        with patch('src.server.main', MagicMock()) as main_mock:
+            with patch('src.server.asyncio.run') as asyncio_run_mock:
+                server.run()
+                main_mock.assert_called_once_with(None)
+                uvloop_mock.run.assert_called_once_with(main_mock())
+                asyncio_run_mock.assert_not_called()
+
+
+def test_run_without_uvloop() -> None:
+    """ Test the `run` function falls back to asyncio without uvloop. """
+    with patch('src.server.uvloop', None), \
+            patch('src.server.start_log_listener') as listener_mock:
+        with patch('src.server.main', MagicMock()) as main_mock:
+            with patch('src.server.asyncio.run') as asyncio_run_mock:
+                server.run()
+                asyncio_run_mock.assert_called_once_with(main_mock())
+                listener_mock.return_value.stop.assert_called_once()
+
+
+def test_start_log_listener() -> None:
+    """ Test log records are handed to the original handlers by a thread. """
+    root = logging.getLogger()
+    saved_handlers = root.handlers
+    handler = MagicMock()
+    handler.level = logging.NOTSET
+    root.handlers = [handler]
+    try:
+        listener = server.start_log_listener()
+        assert isinstance(root.handlers[0], logging.handlers.QueueHandler)
+        root.handlers[0].handle(logging.makeLogRecord(
+            {"msg": "hello", "levelno": logging.INFO}
+        ))
+        listener.stop()
+    finally:
+        root.handlers = saved_handlers
+
+    handler.handle.assert_called_once()
+    assert handler.handle.call_args.args[0].getMessage() == "hello"
+
+
+def test_stop_on_sigterm() -> None:
+    """ Test SIGTERM is turned into an exit with the shell's status. """
+    with pytest.raises(SystemExit) as exc_info:
+        server.stop_on_sigterm(signal.SIGTERM, None)
+    assert exc_info.value.code == 128 + signal.SIGTERM
+
+
+@pytest.mark.parametrize("reuse_port, cpu_count, expected", [
+    (True, 4, 4),
+    (True, None, 1),
+    (False, 4, 1),
+])
+def test_start_workers(reuse_port: bool, cpu_count: int | None,
+                       expected: int) -> None:
+    """ Test the `start_workers` function starts one process per core. """
+    ssl_context = MagicMock()
+    with patch('src.server.REUSE_PORT', reuse_port):
+        with patch('src.server.os.cpu_count', return_value=cpu_count):
+            with patch('src.server.multiprocessing.get_context') as context:
+                processes = server.start_workers(ssl_context)
+
+    assert len(processes) == expected
+    assert context.return_value.Process.call_count == expected
+    context.return_value.Process.assert_called_with(
+        target=server.run, args=(ssl_context,), daemon=True
+    )
+    context.return_value.Process.return_value.start.assert_called()
 
 
 def test_create_ssl_context_success() -> None:
     """ Test the `create_ssl_context` function on success. """
-    with patch('src.server.os.path.exists', return_value=True):
+    with patch('src.server.os.path.isfile', return_value=True):
         patch_default_context = patch('src.server.ssl.create_default_context')
         with patch_default_context as default_context:
             context_mock = MagicMock()
@@ -185,88 +530,127 @@ def test_create_ssl_context_success() -> None:
             context_mock.load_cert_chain.assert_called_once_with(
                 certfile=server.CERTFILE, keyfile=server.KEYFILE
                 )
+            context_mock.set_ciphers.assert_called_once_with(
+                server.SSL_CIPHERS
+            )
             assert context == context_mock
 
 
-def test_create_ssl_context_missing_certfile() -> None:
-    """ Test the `create_ssl_context` on missing certificate file. """
-    with patch('src.server.os.path.exists',
-               side_effect=lambda path: path != server.CERTFILE):
-        with pytest.raises(FileNotFoundError,
-                           match="SSL certificate or key file not found"):
-            server.create_ssl_context()
+def test_ssl_ciphers() -> None:
+    """ Test `SSL_CIPHERS` only enables ECDHE suites for TLS 1.2. """
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.set_ciphers(server.SSL_CIPHERS)
+    ciphers = [
+        cipher for cipher in context.get_ciphers()
+        if cipher["protocol"] == "TLSv1.2"
+    ]
+    assert ciphers
+    assert all(cipher["kea"] == "kx-ecdhe" for cipher in ciphers)
 
 
-def test_create_ssl_context_missing_keyfile() -> None:
-    """ Test the `create_ssl_context` function on missing key file. """
-    with patch('src.server.os.path.exists',
-               side_effect=lambda path: path != server.KEYFILE):
+@pytest.mark.parametrize("missing", [
+    ["CERTFILE"],
+    ["KEYFILE"],
+    ["CERTFILE", "KEYFILE"],
+])
+def test_create_ssl_context_missing_files(missing: list[str]) -> None:
+    """ Test the `create_ssl_context` function on missing files. """
+    missing_paths = [getattr(server, name) for name in missing]
+    with patch('src.server.os.path.isfile',
+               side_effect=lambda path: path not in missing_paths):
         with pytest.raises(FileNotFoundError,
-                           match="SSL certificate or key file not found"):
+                           match="SSL certificate or key file not found") \
+                as exc_info:
             server.create_ssl_context()
+    assert str(exc_info.value).endswith(", ".join(missing_paths))
 
 
-def test_create_ssl_context_missing_both_files() -> None:
-    """ Test creating a SSL context with missing files. """
-    with patch('src.server.os.path.exists', return_value=False):
-        with pytest.raises(FileNotFoundError,
-                           match="SSL certificate or key file not found"):
+def test_create_ssl_context_directory(tmp_path: Path) -> None:
+    """ Test a directory configured as the certificate is rejected. """
+    with patch('src.server.CERTFILE', str(tmp_path)):
+        with pytest.raises(FileNotFoundError, match="not found"):
             server.create_ssl_context()
 
 
-@pytest.fixture
-def temp_text_file(tmp_path: Path) -> Path:
-    """ Create a temporary text file. """
-    file_path = tmp_path / "test.txt"
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write("Line 1\nLine 2\nLine 3")
+@pytest.fixture(scope="session")
+def temp_text_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """ Create a temporary text file, shared as the tests only read it. """
+    file_path = tmp_path_factory.mktemp("data") / "test.txt"
+    file_path.write_text("Line 1\nLine 2\nLine 3", encoding="utf-8")
     return file_path
 
 
+def test_get_contents_cached(tmp_path: Path) -> None:
+    """ Test the file is only reread after it changes. """
+    # This test appends to the file, so it uses its own copy
+    text_path = tmp_path / "test.txt"
+    text_path.write_text("Line 1\nLine 2\nLine 3", encoding="utf-8")
+    # Paths are passed as str, as the server does
+    temp_text_file = str(text_path)
+    # Start empty, the autouse fixture puts the original entries back
+    server._contents_cache.clear()
+    with patch('src.server.load_txt_file',
+               wraps=server.load_txt_file) as load_mock:
+        contents = server.get_contents(temp_text_file)
+        assert contents == frozenset([b"Line 1", b"Line 2", b"Line 3"])
+        assert server.get_contents(temp_text_file) is contents
+        assert load_mock.call_count == 1
+
+        with open(temp_text_file, "a", encoding="utf-8") as f:
+            f.write("\nLine 4")
+        assert b"Line 4" in server.get_contents(temp_text_file)
+        assert load_mock.call_count == 2
+        # Only the latest version of the file is kept
+        assert len(server._contents_cache) == 1
+
+
+def test_get_contents_file_not_found() -> None:
+    """ Test getting the contents of a non-existent text file. """
+    msg = "Error: The file 'dummy_path' was not found."
+    with pytest.raises(FileNotFoundError, match=re.escape(msg)):
+        server.get_contents("dummy_path")
+
+
 def test_load_txt_file_exists(temp_text_file: str) -> None:
     """ Test loading an existing text file. """
     contents = server.load_txt_file(temp_text_file)
-    assert contents == ["Line 1", "Line 2", "Line 3"]
+    assert contents == [b"Line 1", b"Line 2", b"Line 3"]
 
 
-def test_load_txt_file_file_not_found() -> None:
-    """ Test loading a non-existent text file. """
-    msg = "Error: The file 'dummy_path' was not found."
-    with patch("builtins.open", side_effect=FileNotFoundError):
-        with pytest.raises(FileNotFoundError, match=msg):
-            server.load_txt_file("dummy_path")
-
-
-def test_load_txt_file_permission_error() -> None:
-    """ Test loading a text file with permission error. """
-    with patch("builtins.open", side_effect=PermissionError):
-        msg = "Error: Permission denied for file 'dummy_path'."
-        with pytest.raises(PermissionError, match=msg):
-            server.load_txt_file("dummy_path")
-
+def test_load_txt_file_large(tmp_path: Path) -> None:
+    """ Test loading a text file of about 1 MB in one read. """
+    file_path = tmp_path / "large.txt"
+    # Padded lines, so stripping is checked as well as the CRLF split
+    lines = [b" %d;0;1;26;0;7;3;0;\t" % i for i in range(50_000)]
+    file_path.write_bytes(b"\r\n".join(lines) + b"\n")
+    assert file_path.stat().st_size > 1_000_000
 
-def test_load_txt_file_is_a_directory_error() -> None:
-    """ Test loading a text file that is a directory. """
-    with patch("builtins.open", side_effect=IsADirectoryError):
-        msg = "Error: The path 'dummy_path' is a directory, not a file."
-        with pytest.raises(IsADirectoryError, match=msg):
-            server.load_txt_file("dummy_path")
+    contents = server.load_txt_file(str(file_path))
+    assert contents == [line.strip() for line in lines]
 
 
-def test_load_txt_file_io_error() -> None:
-    """ Test loading a text file with an I/O error. """
-    with patch("builtins.open", side_effect=IOError("Some I/O error")):
-        msg = "Error: An I/O error occurred: Some I/O error"
-        with pytest.raises(IOError, match=msg):
+@pytest.mark.parametrize("error, msg", [
+    (FileNotFoundError, "Error: The file 'dummy_path' was not found."),
+    (PermissionError, "Error: Permission denied for file 'dummy_path'."),
+    (IsADirectoryError,
+     "Error: The path 'dummy_path' is a directory, not a file."),
+    (IOError("Some I/O error"),
+     "Error: An I/O error occurred: Some I/O error"),
+])
+def test_load_txt_file_errors(error: type[Exception] | Exception,
+                              msg: str) -> None:
+    """ Test loading a text file that cannot be read. """
+    expected = error if isinstance(error, type) else type(error)
+    with patch("builtins.open", side_effect=error):
+        with pytest.raises(expected, match=re.escape(msg)):
             server.load_txt_file("dummy_path")
 
 
-@pytest.fixture
-def temp_config_file(tmp_path: Path) -> Path:
-    """ Test fixture to create a temporary config file. """
-    file_path = tmp_path / "test-config.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump({"key": "value"}, f)
+@pytest.fixture(scope="session")
+def temp_config_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """ Test fixture to create a temporary config file for the session. """
+    file_path = tmp_path_factory.mktemp("config") / "test-config.json"
+    file_path.write_text(json.dumps({"key": "value"}), encoding="utf-8")
     return file_path
 
 
@@ -277,34 +661,50 @@ def test_load_config_exists(temp_config_file: str) -> None:
     assert config == {"key": "value"}
 
 
-def test_load_config_file_file_not_found() -> None:
-    """ Test loading a non-existent config file. """
-    msg = "Error: The file 'dummy_path' does not exist."
-    with patch("builtins.open", side_effect=FileNotFoundError):
-        with pytest.raises(FileNotFoundError, match=msg):
-            server.load_config("dummy_path")
-
-
-def test_load_config_file_permission_error() -> None:
-    """ Test loading a config file with a permission error. """
-    with patch("builtins.open", side_effect=PermissionError):
-        msg = "Error: Permission denied for file 'dummy_path'."
-        with pytest.raises(PermissionError, match=msg):
-            server.load_config("dummy_path")
-
-
-def test_load_config_file_is_a_directory_error() -> None:
-    """ Test loading a config file that is a directory. """
-    with patch("builtins.open", side_effect=IsADirectoryError):
-        msg = "Error: The path 'dummy_path' is a directory, not a file."
-        with pytest.raises(IsADirectoryError, match=msg):
-            server.load_config("dummy_path")
-
-
-def test_load_config_file_json_decode_error() -> None:
-    """ Test loading a config file with a JSON decode error. """
-    msg = "Error: The file 'dummy_path' contains invalid JSON."
-    with patch("builtins.open",
-               side_effect=json.JSONDecodeError(msg, doc="dummy_path", pos=0)):
-        with pytest.raises(json.JSONDecodeError, match=msg):
+def test_load_config_cached(temp_config_file: str) -> None:
+    """ Test the config file is only read once per path. """
+    # Other tests may already have loaded the shared config file
+    server.load_config.cache_clear()
+    with patch("builtins.open", wraps=open) as open_mock:
+        first = server.load_config(temp_config_file)
+        second = server.load_config(temp_config_file)
+    assert first is second
+    open_mock.assert_called_once()
+    # The shared result cannot be changed by one of its callers
+    with pytest.raises(TypeError):
+        first["key"] = "changed"  # type: ignore[index]
+
+
+@pytest.mark.parametrize("parser", [server.orjson, None])
+def test_load_config_parsers(tmp_path: Path, parser: object) -> None:
+    """ Test the config is parsed with and without orjson. """
+    config_path = tmp_path / "config.json"
+    config_path.write_text('{"server_port": 8001}', encoding='utf-8')
+    with patch("src.server.orjson", parser):
+        assert server.load_config(str(config_path)) == {"server_port": 8001}
+
+
+def test_load_config_invalid_json(tmp_path: Path) -> None:
+    """ Test a file with invalid JSON raises `JSONDecodeError`. """
+    config_path = tmp_path / "config.json"
+    config_path.write_text('{"server_port": ', encoding='utf-8')
+    msg = f"Error: The file '{config_path}' contains invalid JSON."
+    with pytest.raises(json.JSONDecodeError, match=re.escape(msg)):
+        server.load_config(str(config_path))
+
+
+@pytest.mark.parametrize("error, msg", [
+    (FileNotFoundError, "Error: The file 'dummy_path' does not exist."),
+    (PermissionError, "Error: Permission denied for file 'dummy_path'."),
+    (IsADirectoryError,
+     "Error: The path 'dummy_path' is a directory, not a file."),
+    (json.JSONDecodeError("Expecting value", doc="dummy_path", pos=0),
+     "Error: The file 'dummy_path' contains invalid JSON."),
+])
+def test_load_config_errors(error: type[Exception] | Exception,
+                            msg: str) -> None:
+    """ Test loading a config file that cannot be read or parsed. """
+    expected = error if isinstance(error, type) else type(error)
+    with patch("builtins.open", side_effect=error):
+        with pytest.raises(expected, match=re.escape(msg)):
             server.load_config("dummy_path")